@@ -0,0 +1,86 @@
+# Copyright 2022 Sony Group Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Reference implementation of the random number generation in src/random.ts.
+# The same seed and offset produce the same noise in Python and nnabla-js,
+# e.g. to compare generative models between nnabla and nnabla-js.
+
+import argparse
+
+import numpy as np
+
+ROTATIONS = [13, 15, 26, 6, 17, 29, 16, 24]
+PARITY = 0x1BD11BDA
+
+
+def _rotl(x, r):
+    return (x << np.uint32(r)) | (x >> np.uint32(32 - r))
+
+
+def threefry2x32(counter, key):
+    # Threefry-2x32 with 20 rounds
+    k0 = np.uint32(key & 0xFFFFFFFF)
+    k1 = np.uint32(key >> 32)
+    ks = [k0, k1, np.uint32(PARITY) ^ k0 ^ k1]
+    x0 = (counter & 0xFFFFFFFF).astype(np.uint32) + ks[0]
+    x1 = (counter >> np.uint64(32)).astype(np.uint32) + ks[1]
+    for i in range(20):
+        x0 += x1
+        x1 = _rotl(x1, ROTATIONS[i % 8])
+        x1 ^= x0
+        if i % 4 == 3:
+            j = (i + 1) // 4
+            x0 += ks[j % 3]
+            x1 += ks[(j + 1) % 3] + np.uint32(j)
+    return x0, x1
+
+
+def _uniform24(x):
+    # the upper 24 bits are exactly representable in float32
+    return (x >> np.uint32(8)).astype(np.float64) / 16777216.0
+
+
+def generate(size, seed, offset=0, distribution="normal", mu=0.0, sigma=1.0,
+             low=0.0, high=1.0):
+    counter = np.arange((size + 1) // 2, dtype=np.uint64) + np.uint64(offset)
+    with np.errstate(over="ignore"):
+        x0, x1 = threefry2x32(counter, seed)
+    u0 = _uniform24(x0)
+    u1 = _uniform24(x1)
+    if distribution == "normal":
+        # Box-Muller transform
+        radius = np.sqrt(-2.0 * np.log(1.0 - u0))
+        theta = 2.0 * np.pi * u1
+        values = np.stack([radius * np.cos(theta), radius * np.sin(theta)], axis=1)
+        values = mu + sigma * values
+    elif distribution == "uniform":
+        values = low + (high - low) * np.stack([u0, u1], axis=1)
+    else:
+        raise ValueError(f"unknown distribution: {distribution}")
+    return values.reshape(-1)[:size].astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--offset', type=int, default=0)
+    parser.add_argument('--distribution', type=str, default="normal")
+    args = parser.parse_args()
+
+    print(generate(args.size, args.seed, args.offset, args.distribution))
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@
 // See the License for the specific language governing permissions and
 // limitations under the License.
 
+import { Texture } from 'gpu.js';
 import { Executor as ProtoExecutor } from './proto/nnabla_pb';
 import Function from './function';
 import Network from './network';
@@ -72,7 +73,7 @@ export class Executor {
   }
 
   forward(
-    inputs: { [key: string]: number[] },
+    inputs: { [key: string]: number[] | Texture },
     config?: ForwardConfig,
   ): { [key: string]: number[] } {
     let verbose = false;
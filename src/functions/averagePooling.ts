@@ -39,37 +39,49 @@ export default class AveragePooling implements FunctionImpl {
   }
 
   setup(inputs: Variable[], outputs: Variable[]): void {
-    if (this.param.getChannelLast()) {
-      throw Error('channelLast option is not supported yet.');
-    }
+    const channelLast = this.param.getChannelLast();
 
     // Apply im2col
-    // (B, C, K, L)
+    // (B, C, K, L) or (B, L, K, C)
     [this.im2colKernel, this.im2colShape] = createIm2ColKernel(
       this.gpu,
       inputs[0].shape,
       getAsArrayOrThrow<number>(this.param.getKernel()?.getDimList()),
       getAsArrayOrThrow<number>(this.param.getStride()?.getDimList()),
       getAsArrayOrThrow<number>(this.param.getPad()?.getDimList()),
+      channelLast,
     );
     this.im2colKernel.setPipeline(true);
-    const [, , K, L] = this.im2colShape;
+    const [, , K] = this.im2colShape;
+    const C = channelLast ? this.im2colShape[3] : this.im2colShape[1];
+    const L = channelLast ? this.im2colShape[1] : this.im2colShape[3];
 
-    // (B, C, K, L) -> (B, C, L)
+    // (B, C, K, L) -> (B, C, L) or (B, L, K, C) -> (B, L, C)
     this.poolingKernel = this.gpu
       .createKernel(function (x: number[]): number {
         const tK = this.constants.K as number;
         const tL = this.constants.L as number;
-        const bcIndex = Math.floor(this.thread.x / tL);
-        const lIndex = this.thread.x % tL;
-        const index = bcIndex * tK * tL + lIndex;
+        const tC = this.constants.C as number;
+        let index = 0;
+        let step = 0;
+        if (this.constants.channelLast) {
+          const blIndex = Math.floor(this.thread.x / tC);
+          const cIndex = this.thread.x % tC;
+          index = blIndex * tK * tC + cIndex;
+          step = tC;
+        } else {
+          const bcIndex = Math.floor(this.thread.x / tL);
+          const lIndex = this.thread.x % tL;
+          index = bcIndex * tK * tL + lIndex;
+          step = tL;
+        }
         let sum = 0.0;
         for (let i = 0; i < tK; i += 1) {
-          sum += x[index + i * tL];
+          sum += x[index + i * step];
         }
         return sum / tK;
       })
-      .setConstants({ K, L })
+      .setConstants({ C, K, L, channelLast })
       .setOutput([outputs[0].size()])
       .setPipeline(true);
   }
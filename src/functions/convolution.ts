@@ -43,20 +43,22 @@ export default class Convolution implements FunctionImpl {
   }
 
   setup(inputs: Variable[], outputs: Variable[]): void {
-    if (this.param.getChannelLast()) {
-      throw Error('channelLast option is not supported yet.');
-    }
+    const channelLast = this.param.getChannelLast();
 
     // Apply im2col
+    // (B, C, H, W) -> (B, C, K, L) or (B, H, W, C) -> (B, L, K, C)
     [this.im2colKernel, this.im2colShape] = createIm2ColKernel(
       this.gpu,
       inputs[0].shape,
-      inputs[1].shape.slice(2),
+      channelLast ? inputs[1].shape.slice(1, 3) : inputs[1].shape.slice(2),
       getAsArrayOrThrow<number>(this.param.getStride()?.getDimList()),
       getAsArrayOrThrow<number>(this.param.getPad()?.getDimList()),
+      channelLast,
     );
     this.im2colKernel.setPipeline(true);
-    const [B, C, K, L] = this.im2colShape;
+    const [B, , K] = this.im2colShape;
+    const C = channelLast ? this.im2colShape[3] : this.im2colShape[1];
+    const L = channelLast ? this.im2colShape[1] : this.im2colShape[3];
 
     const wC = inputs[1].shape[0];
     let kernelSize = 1;
@@ -69,24 +71,39 @@ export default class Convolution implements FunctionImpl {
     }
 
     // Apply batch matmul
-    [this.matmulKernel] = createBatchMatmulKernel(
-      this.gpu,
-      [1, wC, kernelSize / wC],
-      [B, C * K, L],
-      false,
-      false,
-    );
+    if (channelLast) {
+      // (B, L, K x C) x (OC, K x C)^T -> (B, L, OC)
+      [this.matmulKernel] = createBatchMatmulKernel(
+        this.gpu,
+        [B, L, K * C],
+        [1, wC, kernelSize / wC],
+        false,
+        true,
+      );
+    } else {
+      // (OC, C x K) x (B, C x K, L) -> (B, OC, L)
+      [this.matmulKernel] = createBatchMatmulKernel(
+        this.gpu,
+        [1, wC, kernelSize / wC],
+        [B, C * K, L],
+        false,
+        false,
+      );
+    }
     this.matmulKernel.setPipeline(true);
 
     // Apply bias
     if (inputs.length === 3) {
       this.biasKernel = this.gpu
         .createKernel(function (x: number[], b: number[]): number {
+          if (this.constants.channelLast) {
+            return x[this.thread.x] + b[this.thread.x % (this.constants.C as number)];
+          }
           const dataSize = (this.constants.C as number) * (this.constants.L as number);
           const col = Math.floor((this.thread.x % dataSize) / (this.constants.L as number));
           return x[this.thread.x] + b[col];
         })
-        .setConstants({ C: wC, L })
+        .setConstants({ C: wC, L, channelLast })
         .setOutput([outputs[0].size()])
         .setPipeline(true);
     }
@@ -112,7 +129,12 @@ export default class Convolution implements FunctionImpl {
     }
 
     const im2colOutput = this.im2colKernel(inputs[0].data);
-    let output = this.matmulKernel(inputs[1].data, im2colOutput) as Texture;
+    let output: Texture;
+    if (this.param.getChannelLast()) {
+      output = this.matmulKernel(im2colOutput, inputs[1].data) as Texture;
+    } else {
+      output = this.matmulKernel(inputs[1].data, im2colOutput) as Texture;
+    }
 
     if (this.biasKernel) {
       if (!inputs[2].isTexture()) {
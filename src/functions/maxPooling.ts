@@ -39,9 +39,7 @@ export default class MaxPooling implements FunctionImpl {
   }
 
   setup(inputs: Variable[], outputs: Variable[]): void {
-    if (this.param.getChannelLast()) {
-      throw Error('channelLast option is not supported yet.');
-    }
+    const channelLast = this.param.getChannelLast();
 
     // Apply im2col
     [this.im2colKernel, this.im2colShape] = createIm2ColKernel(
@@ -50,26 +48,42 @@ export default class MaxPooling implements FunctionImpl {
       getAsArrayOrThrow<number>(this.param.getKernel()?.getDimList()),
       getAsArrayOrThrow<number>(this.param.getStride()?.getDimList()),
       getAsArrayOrThrow<number>(this.param.getPad()?.getDimList()),
+      channelLast,
     );
     this.im2colKernel.setPipeline(true);
-    const [, , K, L] = this.im2colShape;
+    const [, , K] = this.im2colShape;
+    const C = channelLast ? this.im2colShape[3] : this.im2colShape[1];
+    const L = channelLast ? this.im2colShape[1] : this.im2colShape[3];
 
     this.poolingKernel = this.gpu
       .createKernel(function (x: number[]): number {
         const tK = this.constants.K as number;
         const tL = this.constants.L as number;
-        const bcIndex = Math.floor(this.thread.x / tL);
-        const lIndex = this.thread.x % tL;
-        const index = bcIndex * tK * tL + lIndex;
+        const tC = this.constants.C as number;
+        let index = 0;
+        let step = 0;
+        if (this.constants.channelLast) {
+          // (B, L, K, C) -> (B, L, C)
+          const blIndex = Math.floor(this.thread.x / tC);
+          const cIndex = this.thread.x % tC;
+          index = blIndex * tK * tC + cIndex;
+          step = tC;
+        } else {
+          // (B, C, K, L) -> (B, C, L)
+          const bcIndex = Math.floor(this.thread.x / tL);
+          const lIndex = this.thread.x % tL;
+          index = bcIndex * tK * tL + lIndex;
+          step = tL;
+        }
         let maxValue = x[index];
         for (let i = 1; i < tK; i += 1) {
-          if (x[index + i * tL] > maxValue) {
-            maxValue = x[index + i * tL];
+          if (x[index + i * step] > maxValue) {
+            maxValue = x[index + i * step];
           }
         }
         return maxValue;
       })
-      .setConstants({ K, L })
+      .setConstants({ C, K, L, channelLast })
       .setOutput([outputs[0].size()])
       .setPipeline(true);
   }
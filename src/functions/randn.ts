@@ -12,41 +12,41 @@
 // See the License for the specific language governing permissions and
 // limitations under the License.
 
-import { GPU, IKernelRunShortcut, Texture } from 'gpu.js';
+import { GPU } from 'gpu.js';
 import { RandnParameter } from '../proto/nnabla_pb';
 import FunctionImpl from './base';
 import Variable from '../variable';
+import { RandomGenerator } from '../random';
 
 export default class Randn implements FunctionImpl {
   gpu: GPU;
 
-  kernel: IKernelRunShortcut | undefined;
+  generator: RandomGenerator | undefined;
 
   param: RandnParameter;
 
   constructor(param: RandnParameter, gpu: GPU) {
     this.gpu = gpu;
-    this.kernel = undefined;
+    this.generator = undefined;
     this.param = param;
   }
 
   setup(_: Variable[], outputs: Variable[]): void {
-    this.kernel = this.gpu
-      .createKernel(function (): number {
-        // Sample from uniform distribution [0, 1]
-        const a = Math.random();
-        const term = 2 * a - 1;
-        // Taylor expansion
-        let value = term;
-        value += (3.14159265 / 12) * term ** 3;
-        value += ((7.0 * 3.14159265) / 480) * term ** 5;
-        value *= Math.sqrt(2 * 3.14159265) / 2;
-        // apply mu and sigma
-        return (this.constants.mu as number) + value * (this.constants.sigma as number);
-      })
-      .setOutput([outputs[0].size()])
-      .setConstants({ sigma: this.param.getSigma(), mu: this.param.getMu() })
-      .setPipeline(true);
+    // seed=-1 represents a random seed
+    const seed = this.param.getSeed();
+    this.generator = new RandomGenerator(this.gpu, outputs[0].size(), {
+      distribution: 'normal',
+      mu: this.param.getMu(),
+      sigma: this.param.getSigma(),
+      seed: seed === -1 ? undefined : seed,
+    });
+  }
+
+  setSeed(seed: number, offset = 0): void {
+    if (this.generator === undefined) {
+      throw Error('call setup first.');
+    }
+    this.generator.setSeed(seed, offset);
   }
 
   static validate(inputs: Variable[], outputs: Variable[]): void {
@@ -59,12 +59,11 @@ export default class Randn implements FunctionImpl {
   }
 
   forward(inputs: Variable[], outputs: Variable[]): void {
-    if (this.kernel === undefined) {
+    if (this.generator === undefined) {
       throw Error('call setup first.');
     }
     Randn.validate(inputs, outputs);
 
-    const output = this.kernel() as Texture;
-    outputs[0].setData(output);
+    outputs[0].setData(this.generator.generate());
   }
 }
@@ -249,17 +249,95 @@ export function createIm2Col2dKernel(
   return [kernel, outputShape];
 }
 
+export function createIm2Col2dChannelLastKernel(
+  gpu: GPU,
+  shape: number[],
+  kernelShape: number[],
+  stride: number[],
+  pad: number[],
+): [IKernelRunShortcut, number[]] {
+  // (B, H, W, C) -> (B, L, K, C)
+  // L is the output HxW
+  // K is the kernel HxW
+
+  const [B, H, W, C] = shape;
+  const [kH, kW] = kernelShape;
+  const [sH, sW] = stride;
+  const [pH, pW] = pad;
+
+  // Calculate convoluted shape
+  const oB = B;
+  const oH = Math.floor((H + 2 * pH - kH) / sH) + 1;
+  const oW = Math.floor((W + 2 * pW - kW) / sW) + 1;
+
+  // Calculate im2col shape
+  const K = kH * kW;
+  const L = oH * oW;
+  const outputShape = [oB, L, K, C];
+  const outputSize = oB * L * K * C;
+
+  const kernel = gpu
+    .createKernel(function (x: number[]): number {
+      // (B, H, W, C) -> (B, L, K, C)
+      const tH = this.constants.H as number;
+      const tW = this.constants.W as number;
+      const tC = this.constants.C as number;
+      const tKW = this.constants.kW as number;
+      const tSH = this.constants.sH as number;
+      const tSW = this.constants.sW as number;
+      const tPH = this.constants.pH as number;
+      const tPW = this.constants.pW as number;
+      const tOW = this.constants.oW as number;
+      const tK = this.constants.K as number;
+      const tL = this.constants.L as number;
+      const cIndex = this.thread.x % tC;
+      const kIndex = Math.floor(this.thread.x / tC) % tK;
+      const lIndex = Math.floor(this.thread.x / (tC * tK)) % tL;
+      const bIndex = Math.floor(this.thread.x / (tC * tK * tL));
+      const hIndex = Math.floor(lIndex / tOW);
+      const wIndex = lIndex % tOW;
+      const yK = Math.floor(kIndex / tKW);
+      const xK = kIndex % tKW;
+      const yI = hIndex * tSH - tPH + yK;
+      const xI = wIndex * tSW - tPW + xK;
+      if (yI >= 0 && xI >= 0 && yI < tH && xI < tW) {
+        return x[bIndex * tH * tW * tC + yI * tW * tC + xI * tC + cIndex];
+      }
+      return 0.0;
+    })
+    .setConstants({
+      H,
+      W,
+      C,
+      kW,
+      sH,
+      sW,
+      pH,
+      pW,
+      oW,
+      K,
+      L,
+    })
+    .setOutput([outputSize]);
+
+  return [kernel, outputShape];
+}
+
 export function createIm2ColKernel(
   gpu: GPU,
   shape: number[],
   kernelShape: number[],
   stride: number[],
   pad: number[],
+  channelLast = false,
 ): [IKernelRunShortcut, number[]] {
   if (shape.length === 4) {
+    if (channelLast) {
+      return createIm2Col2dChannelLastKernel(gpu, shape, kernelShape, stride, pad);
+    }
     return createIm2Col2dKernel(gpu, shape, kernelShape, stride, pad);
   }
-  throw Error('im2col only supports (B, C, H, W) shape.');
+  throw Error('im2col only supports (B, C, H, W) or (B, H, W, C) shape.');
 }
 
 export function createCol2Im2dKernel(
@@ -63,11 +63,12 @@ export function convertArrayToImage(
  * Returns Array object from ImageData.
  *
  * @remarks
- * The resulted array is aranged in (C, H, W).
+ * The resulted array is aranged in (C, H, W), or (H, W, C) if channelLast is true.
  *
  * @param imageData - The source ImageData object.
  * @param channel - The channel size. If 1 is given, each pixel is averanged over RGB.
  * @param multiplier - The multiplier applied to each pixel. If not given, each pixel will be divided by 255.
+ * @param channelLast - The flag to keep the pixel order of ImageData for channel-last models.
  * @returns The Array object.
  *
  */
@@ -75,6 +76,7 @@ export function convertImageToArray(
   imageData: ImageData,
   channel: number,
   multiplier: number | undefined,
+  channelLast?: boolean,
 ): number[] {
   const { height } = imageData;
   const { width } = imageData;
@@ -86,6 +88,12 @@ export function convertImageToArray(
       const b = imageData.data[4 * i + 2];
       y.push((r + g + b) / 3);
     }
+  } else if (channel === 3 && channelLast) {
+    for (let i = 0; i < height * width; i += 1) {
+      for (let c = 0; c < 3; c += 1) {
+        y.push((multiplier || 1 / 255.0) * imageData.data[4 * i + c]);
+      }
+    }
   } else if (channel === 3) {
     for (let c = 0; c < 3; c += 1) {
       for (let i = 0; i < height * width; i += 1) {
@@ -14,10 +14,12 @@
 
 import { NNP } from './nnp';
 import * as ImageUtils from './imageUtils';
+import { RandomGenerator } from './random';
 
 const nnabla = {
   NNP,
   ImageUtils,
+  RandomGenerator,
 };
 
 export default nnabla;
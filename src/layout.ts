@@ -0,0 +1,497 @@
+// Copyright 2022 Sony Group Corporation.
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+import {
+  Executor as ProtoExecutor,
+  Function as ProtoFunction,
+  Network as ProtoNetwork,
+  ReshapeParameter,
+  Shape,
+  TransposeParameter,
+  Variable as ProtoVariable,
+} from './proto/nnabla_pb';
+import Variable from './variable';
+import VariableManager from './variableManager';
+
+const NHWC_TO_NCHW = [0, 3, 1, 2];
+const NCHW_TO_NHWC = [0, 2, 3, 1];
+
+// Functions computing each element independently of the memory layout.
+const ELEMENTWISE_FUNCTIONS = [
+  'Add2',
+  'AddScalar',
+  'Div2',
+  'ELU',
+  'Exp',
+  'LeakyReLU',
+  'Mul2',
+  'MulScalar',
+  'Pow2',
+  'PowScalar',
+  'ReLU',
+  'Sigmoid',
+  'Sub2',
+  'Tanh',
+];
+
+interface Graph {
+  variables: { [key: string]: ProtoVariable };
+  consumers: { [key: string]: ProtoFunction[] };
+}
+
+interface Region {
+  functions: ProtoFunction[];
+  variables: string[];
+  exits: ProtoFunction[];
+  boundaries: { [key: string]: ProtoFunction[] };
+}
+
+function sameAxes(axes: number[], expected: number[]): boolean {
+  return axes.length === expected.length && axes.every((axis, i) => axis === expected[i]);
+}
+
+function permute(shape: number[], axes: number[]): number[] {
+  return axes.map((axis) => shape[axis]);
+}
+
+function getShape(variable: ProtoVariable): number[] {
+  const shape = variable.getShape();
+  return shape === undefined ? [] : shape.getDimList();
+}
+
+function getSize(variable: ProtoVariable): number {
+  // -1 represents batch dimension
+  return getShape(variable).reduce((size, dim) => size * (dim === -1 ? 1 : dim), 1);
+}
+
+function buildGraph(network: ProtoNetwork): Graph {
+  const variables: { [key: string]: ProtoVariable } = {};
+  for (const variable of network.getVariableList()) {
+    variables[variable.getName()] = variable;
+  }
+
+  const consumers: { [key: string]: ProtoFunction[] } = {};
+  for (const func of network.getFunctionList()) {
+    for (const name of func.getInputList()) {
+      if (!Object.prototype.hasOwnProperty.call(consumers, name)) {
+        consumers[name] = [];
+      }
+      if (!consumers[name].includes(func)) {
+        consumers[name].push(func);
+      }
+    }
+  }
+
+  return { variables, consumers };
+}
+
+function isTranspose(func: ProtoFunction, axes: number[]): boolean {
+  if (func.getType() !== 'Transpose') {
+    return false;
+  }
+  const param = func.getTransposeParam();
+  return param !== undefined && sameAxes(param.getAxesList(), axes);
+}
+
+function isFourDimensional(graph: Graph, name: string): boolean {
+  return (
+    Object.prototype.hasOwnProperty.call(graph.variables, name) &&
+    getShape(graph.variables[name]).length === 4
+  );
+}
+
+function canRunChannelLast(
+  func: ProtoFunction,
+  graph: Graph,
+  variableManager: VariableManager,
+  regionVariables: string[],
+): boolean {
+  const inputs = func.getInputList();
+  if (inputs.length === 0 || !isFourDimensional(graph, inputs[0])) {
+    return false;
+  }
+
+  switch (func.getType()) {
+    case 'Convolution': {
+      const param = func.getConvolutionParam();
+      if (param === undefined || param.getChannelLast()) {
+        return false;
+      }
+      // Only the data input can be transformed. Weights are reordered on the host.
+      if (inputs.slice(1).some((name) => regionVariables.includes(name))) {
+        return false;
+      }
+      const weightName = inputs[1];
+      return (
+        graph.variables[weightName]?.getType() === 'Parameter' &&
+        variableManager.hasVariable(weightName) &&
+        Array.isArray(variableManager.getVariable(weightName).data) &&
+        variableManager.getVariable(weightName).shape.length === 4
+      );
+    }
+    case 'MaxPooling': {
+      const param = func.getMaxPoolingParam();
+      return param !== undefined && !param.getChannelLast();
+    }
+    case 'AveragePooling': {
+      const param = func.getAveragePoolingParam();
+      return param !== undefined && !param.getChannelLast();
+    }
+    case 'BatchNormalization': {
+      const param = func.getBatchNormalizationParam();
+      if (param === undefined || !sameAxes(param.getAxesList(), [1])) {
+        return false;
+      }
+      // Statistics are indexed by channel and do not depend on the layout.
+      return !inputs.slice(1).some((name) => regionVariables.includes(name));
+    }
+    default:
+      if (!ELEMENTWISE_FUNCTIONS.includes(func.getType())) {
+        return false;
+      }
+      return inputs.every((name) => regionVariables.includes(name));
+  }
+}
+
+function growRegion(
+  entry: ProtoFunction,
+  graph: Graph,
+  variableManager: VariableManager,
+  preservedNames: string[],
+): Region | undefined {
+  const region: Region = { functions: [], variables: [], exits: [], boundaries: {} };
+  const [entryOutput] = entry.getOutputList();
+  const queue = [entryOutput];
+  let pending: ProtoFunction[] = [];
+
+  const visit = (name: string): void => {
+    region.variables.push(name);
+    for (const func of graph.consumers[name] || []) {
+      if (!region.functions.includes(func) && !region.exits.includes(func)) {
+        if (isTranspose(func, NCHW_TO_NHWC)) {
+          region.exits.push(func);
+        } else if (canRunChannelLast(func, graph, variableManager, region.variables)) {
+          region.functions.push(func);
+          queue.push(...func.getOutputList());
+          // Joins such as Add2(h, ReLU(h)) are accepted once their last input is visited
+          pending = pending.filter((f) => f !== func);
+        } else if (!pending.includes(func)) {
+          // Elementwise functions may become convertible once all inputs are visited
+          pending.push(func);
+        }
+      }
+    }
+  };
+
+  let changed = true;
+  while (changed) {
+    while (queue.length > 0) {
+      const name = queue.shift() as string;
+      if (!region.variables.includes(name)) {
+        if (preservedNames.includes(name) || !isFourDimensional(graph, name)) {
+          return undefined;
+        }
+        visit(name);
+      }
+    }
+    changed = false;
+    const remaining: ProtoFunction[] = [];
+    for (const func of pending.filter((f) => !region.functions.includes(f))) {
+      if (canRunChannelLast(func, graph, variableManager, region.variables)) {
+        region.functions.push(func);
+        queue.push(...func.getOutputList());
+        changed = true;
+      } else {
+        remaining.push(func);
+      }
+    }
+    pending = remaining;
+  }
+
+  // The remaining consumers require the channel-first layout
+  for (const func of pending) {
+    for (const name of func.getInputList()) {
+      if (region.variables.includes(name)) {
+        if (!Object.prototype.hasOwnProperty.call(region.boundaries, name)) {
+          region.boundaries[name] = [];
+        }
+        region.boundaries[name].push(func);
+      }
+    }
+  }
+
+  return region;
+}
+
+function replaceInput(func: ProtoFunction, from: string, to: string): void {
+  func.setInputList(func.getInputList().map((name) => (name === from ? to : name)));
+}
+
+function createChannelLastWeight(
+  name: string,
+  network: ProtoNetwork,
+  graph: Graph,
+  variableManager: VariableManager,
+): string {
+  const channelLastName = `${name}/channel_last`;
+  const weight = variableManager.getVariable(name);
+  const shape = permute(weight.shape, NCHW_TO_NHWC);
+
+  if (!variableManager.hasVariable(channelLastName)) {
+    // (OC, C, kH, kW) -> (OC, kH, kW, C)
+    const [OC, C, kH, kW] = weight.shape;
+    const src = weight.data as number[];
+    const data: number[] = [];
+    for (let o = 0; o < OC; o += 1) {
+      for (let h = 0; h < kH; h += 1) {
+        for (let w = 0; w < kW; w += 1) {
+          for (let c = 0; c < C; c += 1) {
+            data.push(src[((o * C + c) * kH + h) * kW + w]);
+          }
+        }
+      }
+    }
+    variableManager.registerVariable(new Variable(channelLastName, shape, data));
+  }
+
+  if (!Object.prototype.hasOwnProperty.call(graph.variables, channelLastName)) {
+    const variable = new ProtoVariable();
+    variable.setName(channelLastName);
+    variable.setType('Parameter');
+    const protoShape = new Shape();
+    protoShape.setDimList(shape);
+    variable.setShape(protoShape);
+    network.addVariable(variable);
+    graph.variables[channelLastName] = variable;
+  }
+
+  return channelLastName;
+}
+
+function addVariable(network: ProtoNetwork, graph: Graph, name: string, dims: number[]): void {
+  const variable = new ProtoVariable();
+  variable.setName(name);
+  variable.setType('Buffer');
+  const shape = new Shape();
+  shape.setDimList(dims);
+  variable.setShape(shape);
+  network.addVariable(variable);
+  graph.variables[name] = variable;
+}
+
+function applyRegion(
+  entry: ProtoFunction,
+  region: Region,
+  network: ProtoNetwork,
+  graph: Graph,
+  variableManager: VariableManager,
+  preservedNames: string[],
+): ProtoFunction[] {
+  const [entryInput] = entry.getInputList();
+  const [entryOutput] = entry.getOutputList();
+  const removed: ProtoFunction[] = [];
+  const inserted: ProtoFunction[] = [];
+
+  // Channel-last data is held by network-local variables.
+  // The original variables keep the channel-first shape since buffers are shared by name.
+  const channelLastNames: { [key: string]: string } = {};
+  for (const name of region.variables) {
+    channelLastNames[name] = name === entryOutput ? entryInput : `${name}/channel_last`;
+  }
+  const toChannelLast = (name: string): string =>
+    region.variables.includes(name) ? channelLastNames[name] : name;
+
+  const functions = region.functions.filter((func, i) => region.functions.indexOf(func) === i);
+  for (const func of functions) {
+    for (const name of func.getOutputList()) {
+      const shape = permute(getShape(graph.variables[name]), NCHW_TO_NHWC);
+      addVariable(network, graph, channelLastNames[name], shape);
+    }
+    func.setInputList(func.getInputList().map(toChannelLast));
+    func.setOutputList(func.getOutputList().map(toChannelLast));
+
+    switch (func.getType()) {
+      case 'Convolution': {
+        const weightName = func.getInputList()[1];
+        const channelLastName = createChannelLastWeight(
+          weightName,
+          network,
+          graph,
+          variableManager,
+        );
+        replaceInput(func, weightName, channelLastName);
+        func.getConvolutionParam()?.setChannelLast(true);
+        break;
+      }
+      case 'MaxPooling':
+        func.getMaxPoolingParam()?.setChannelLast(true);
+        break;
+      case 'AveragePooling':
+        func.getAveragePoolingParam()?.setChannelLast(true);
+        break;
+      case 'BatchNormalization':
+        func.getBatchNormalizationParam()?.setAxesList([3]);
+        break;
+      default:
+        break;
+    }
+  }
+
+  // Consumers of the trailing transpositions read the channel-last data directly
+  for (const func of region.exits) {
+    const [input] = func.getInputList();
+    const [output] = func.getOutputList();
+    if (preservedNames.includes(output)) {
+      // Variables exposed to users are filled by a plain copy instead
+      const param = new ReshapeParameter();
+      param.setShape(graph.variables[output].getShape());
+      func.setType('Reshape');
+      func.setReshapeParam(param);
+      replaceInput(func, input, channelLastNames[input]);
+    } else {
+      for (const consumer of graph.consumers[output] || []) {
+        replaceInput(consumer, output, channelLastNames[input]);
+      }
+      removed.push(func);
+    }
+  }
+
+  // Transpose back to the original variables where other functions need channel-first data
+  for (const name of Object.keys(region.boundaries)) {
+    if (name !== entryOutput) {
+      const param = new TransposeParameter();
+      param.setAxesList(NHWC_TO_NCHW);
+      const transpose = new ProtoFunction();
+      transpose.setName(`${name}/transpose_channel_first`);
+      transpose.setType('Transpose');
+      transpose.setInputList([channelLastNames[name]]);
+      transpose.setOutputList([name]);
+      transpose.setTransposeParam(param);
+      network.addFunction(transpose);
+      inserted.push(transpose);
+    }
+  }
+
+  // The leading transposition is still required by the other consumers
+  if (!Object.prototype.hasOwnProperty.call(region.boundaries, entryOutput)) {
+    removed.push(entry);
+  }
+
+  network.setFunctionList(network.getFunctionList().filter((func) => !removed.includes(func)));
+  return inserted;
+}
+
+/**
+ * Runs convolutional subgraphs in the channel-last layout where it saves transpositions.
+ *
+ * @remarks
+ * Starting from each Transpose function converting (B, H, W, C) into (B, C, H, W),
+ * the consecutive Convolution, pooling, BatchNormalization and elementwise functions
+ * are switched to the channel-last execution.
+ * Their outputs are renamed to `${name}/channel_last`, and the original variables keep
+ * the channel-first shape.
+ * The subgraph is rewritten only when the removed transpositions move more elements
+ * than the transpositions inserted at its boundary.
+ *
+ * @param network - The network to be rewritten in place.
+ * @param variableManager - The VariableManager holding the parameters of the network.
+ * @param preservedNames - The variable names whose layout must not change such as executor inputs and outputs.
+ *
+ */
+export default function optimizeLayout(
+  network: ProtoNetwork,
+  variableManager: VariableManager,
+  preservedNames: string[],
+): void {
+  const visited: ProtoFunction[] = [];
+  for (;;) {
+    const graph = buildGraph(network);
+    const entry = network
+      .getFunctionList()
+      .find(
+        (func) =>
+          !visited.includes(func) &&
+          isTranspose(func, NHWC_TO_NCHW) &&
+          isFourDimensional(graph, func.getOutputList()[0]),
+      );
+    if (entry === undefined) {
+      return;
+    }
+    visited.push(entry);
+
+    const region = growRegion(entry, graph, variableManager, preservedNames);
+    if (region !== undefined && region.functions.length > 0) {
+      const entryOutput = entry.getOutputList()[0];
+      let removedSize = 0;
+      if (!Object.prototype.hasOwnProperty.call(region.boundaries, entryOutput)) {
+        removedSize += getSize(graph.variables[entryOutput]);
+      }
+      for (const func of region.exits) {
+        removedSize += getSize(graph.variables[func.getOutputList()[0]]);
+      }
+      let insertedSize = 0;
+      for (const name of Object.keys(region.boundaries)) {
+        if (name !== entryOutput) {
+          insertedSize += getSize(graph.variables[name]);
+        }
+      }
+
+      if (insertedSize < removedSize) {
+        // The inserted transpositions lead back to channel-first functions
+        const inserted = applyRegion(
+          entry,
+          region,
+          network,
+          graph,
+          variableManager,
+          preservedNames,
+        );
+        visited.push(...inserted);
+      }
+    }
+  }
+}
+
+/**
+ * Applies optimizeLayout to all networks in NNP.
+ *
+ * @remarks
+ * The inputs and outputs of all executors keep the channel-first layout.
+ * Buffer variables are shared by name across networks, and each network holds
+ * its channel-last data in its own variables, so the other networks are unaffected.
+ *
+ * @param networks - The networks to be rewritten in place.
+ * @param executors - The executors of the networks.
+ * @param variableManager - The VariableManager holding the parameters of the networks.
+ *
+ */
+export function optimizeNetworkLayouts(
+  networks: ProtoNetwork[],
+  executors: ProtoExecutor[],
+  variableManager: VariableManager,
+): void {
+  const preservedNames: string[] = [];
+  for (const executor of executors) {
+    for (const v of executor.getDataVariableList()) {
+      preservedNames.push(v.getVariableName());
+    }
+    for (const v of executor.getOutputVariableList()) {
+      preservedNames.push(v.getVariableName());
+    }
+  }
+
+  for (const network of networks) {
+    optimizeLayout(network, variableManager, preservedNames);
+  }
+}
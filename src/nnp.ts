@@ -12,7 +12,7 @@
 // See the License for the specific language governing permissions and
 // limitations under the License.
 
-import { GPU } from 'gpu.js';
+import { GPU, Texture } from 'gpu.js';
 import JSZip from 'jszip';
 import {
   Executor as ProtoExecutor,
@@ -25,6 +25,7 @@ import VariableManager from './variableManager';
 import { getOrThrow } from './utils';
 import { Executor, ForwardConfig } from './executor';
 import Network from './network';
+import { optimizeNetworkLayouts } from './layout';
 
 interface ProtoNNP {
   version: string;
@@ -116,6 +117,9 @@ export class NNP {
       const ctx = gpu === undefined ? new GPU() : gpu;
       const variableManager = VariableManager.fromProtoParameters(nnp.parameters);
 
+      // Run convolutional subgraphs in the channel-last layout where possible
+      optimizeNetworkLayouts(nnp.networks, nnp.executors, variableManager);
+
       const networks: { [key: string]: Network } = {};
       for (const protoNetwork of nnp.networks) {
         const network = Network.fromProtoNetwork(protoNetwork, variableManager, ctx);
@@ -142,14 +146,14 @@ export class NNP {
    * Please check forwardAsync for the asynchronous execution.
    *
    * @param executorName - The specified executor name.
-   * @param data - The mapping of input variable data.
+   * @param data - The mapping of input variable data as arrays or textures.
    * @param config - The config object.
    * @returns The mapping of output variable data.
    *
    */
   forward(
     executorName: string,
-    data: { [key: string]: number[] },
+    data: { [key: string]: number[] | Texture },
     config?: ForwardConfig,
   ): { [key: string]: number[] } {
     this.checkRelease();
@@ -160,14 +164,14 @@ export class NNP {
    * Asnchronously perform forward propagation with the specified executor.
    *
    * @param executorName - The specified executor name.
-   * @param data - The mapping of input variable data.
+   * @param data - The mapping of input variable data as arrays or textures.
    * @param config - The config object.
    * @returns The Promise object that returns the mapping of output variable data.
    *
    */
   forwardAsync(
     executorName: string,
-    data: { [key: string]: number[] },
+    data: { [key: string]: number[] | Texture },
     config?: ForwardConfig,
   ): Promise<{ [key: string]: number[] }> {
     this.checkRelease();
@@ -0,0 +1,272 @@
+// Copyright 2022 Sony Group Corporation.
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+/* eslint-disable no-bitwise */
+
+import { GPU, IKernelRunShortcut, Texture } from 'gpu.js';
+
+export interface RandomConfig {
+  distribution?: 'normal' | 'uniform';
+  mu?: number;
+  sigma?: number;
+  low?: number;
+  high?: number;
+  seed?: number;
+  offset?: number;
+}
+
+/**
+ * Splits an unsigned 64-bit integer into 16-bit limbs from the lowest bits.
+ *
+ * @remarks
+ * The limbs are exactly representable in 32-bit floating point numbers on GPU.
+ *
+ * @param value - The non-negative safe integer.
+ * @returns The four 16-bit limbs.
+ *
+ */
+export function splitToLimbs(value: number): number[] {
+  if (!Number.isSafeInteger(value) || value < 0) {
+    throw Error(`value must be a non-negative safe integer: ${value}`);
+  }
+  const limbs = [];
+  let rest = value;
+  for (let i = 0; i < 4; i += 1) {
+    limbs.push(rest % 65536);
+    rest = Math.floor(rest / 65536);
+  }
+  return limbs;
+}
+
+/**
+ * Returns the kernel function that generates random numbers with Threefry-2x32-20.
+ *
+ * @remarks
+ * The kernel takes the 64-bit key and the 64-bit counter as 16-bit limbs (see splitToLimbs).
+ * The i-th output is generated from the counter offset by floor(i / 2),
+ * so each counter value produces two numbers.
+ * The 32-bit arithmetic is emulated with 16-bit halves to stay exact in 32-bit floating point.
+ *
+ * @param size - The number of random numbers generated in one launch.
+ * @param gpu - The GPU instance.
+ * @param normal - The flag to sample from normal distribution with Box-Muller transform.
+ * Otherwise, the numbers are sampled from uniform distribution [0, 1).
+ * @param scale - The scale applied to each number, sigma or (high - low).
+ * @param shift - The shift applied to each number, mu or low.
+ * @returns The kernel function that generates random numbers.
+ *
+ */
+export function createThreefryKernel(
+  size: number,
+  gpu: GPU,
+  normal: boolean,
+  scale: number,
+  shift: number,
+): IKernelRunShortcut {
+  return gpu
+    .createKernel(function (key: number[], counter: number[]): number {
+      // Key schedule
+      const k0h = key[1];
+      const k0l = key[0];
+      const k1h = key[3];
+      const k1l = key[2];
+      const k2h = 7121 ^ k0h ^ k1h; // 0x1BD1
+      const k2l = 7130 ^ k0l ^ k1l; // 0x1BDA
+
+      // 64-bit counter: counter + floor(thread / 2)
+      const index = Math.floor(this.thread.x / 2);
+      let c0 = counter[0] + (index % 65536);
+      let carry = Math.floor(c0 / 65536);
+      c0 -= carry * 65536;
+      let c1 = counter[1] + Math.floor(index / 65536) + carry;
+      carry = Math.floor(c1 / 65536);
+      c1 -= carry * 65536;
+      let c2 = counter[2] + carry;
+      carry = Math.floor(c2 / 65536);
+      c2 -= carry * 65536;
+      let c3 = counter[3] + carry;
+      c3 -= Math.floor(c3 / 65536) * 65536;
+
+      // x0 = c0 + k0, x1 = c1 + k1
+      let x0l = c0 + k0l;
+      carry = Math.floor(x0l / 65536);
+      x0l -= carry * 65536;
+      let x0h = c1 + k0h + carry;
+      x0h -= Math.floor(x0h / 65536) * 65536;
+      let x1l = c2 + k1l;
+      carry = Math.floor(x1l / 65536);
+      x1l -= carry * 65536;
+      let x1h = c3 + k1h + carry;
+      x1h -= Math.floor(x1h / 65536) * 65536;
+
+      for (let i = 0; i < 20; i += 1) {
+        // x0 += x1
+        x0l += x1l;
+        carry = Math.floor(x0l / 65536);
+        x0l -= carry * 65536;
+        x0h += x1h + carry;
+        x0h -= Math.floor(x0h / 65536) * 65536;
+
+        // x1 = rotl(x1, R[i % 8]) ^ x0 with R = [13, 15, 26, 6, 17, 29, 16, 24]
+        const r = i % 8;
+        let p = 1.0;
+        if (r === 0 || r === 5) {
+          p = 8192.0;
+        } else if (r === 1) {
+          p = 32768.0;
+        } else if (r === 2) {
+          p = 1024.0;
+        } else if (r === 3) {
+          p = 64.0;
+        } else if (r === 4) {
+          p = 2.0;
+        } else if (r === 7) {
+          p = 256.0;
+        }
+        // Rotations by 16 bits or more swap the halves first
+        const swap = r === 2 || r === 4 || r === 5 || r === 6 || r === 7;
+        const hp = (swap ? x1l : x1h) * p;
+        const hq = Math.floor(hp / 65536);
+        const lp = (swap ? x1h : x1l) * p;
+        const lq = Math.floor(lp / 65536);
+        const rh = hp - hq * 65536 + lq;
+        const rl = lp - lq * 65536 + hq;
+        x1h = rh ^ x0h;
+        x1l = rl ^ x0l;
+
+        // Key injection
+        if (i % 4 === 3) {
+          const s = (i + 1) / 4;
+          const sel = s % 3;
+          let a0h = k0h;
+          let a0l = k0l;
+          let a1h = k1h;
+          let a1l = k1l;
+          if (sel === 1) {
+            a0h = k1h;
+            a0l = k1l;
+            a1h = k2h;
+            a1l = k2l;
+          } else if (sel === 2) {
+            a0h = k2h;
+            a0l = k2l;
+            a1h = k0h;
+            a1l = k0l;
+          }
+          x0l += a0l;
+          carry = Math.floor(x0l / 65536);
+          x0l -= carry * 65536;
+          x0h += a0h + carry;
+          x0h -= Math.floor(x0h / 65536) * 65536;
+          x1l += a1l + s;
+          carry = Math.floor(x1l / 65536);
+          x1l -= carry * 65536;
+          x1h += a1h + carry;
+          x1h -= Math.floor(x1h / 65536) * 65536;
+        }
+      }
+
+      // The upper 24 bits are exactly representable in float
+      const u0 = (x0h * 256 + Math.floor(x0l / 256)) / 16777216;
+      const u1 = (x1h * 256 + Math.floor(x1l / 256)) / 16777216;
+      const odd = this.thread.x % 2 === 1;
+
+      let value = 0.0;
+      if (this.constants.normal) {
+        // Box-Muller transform
+        const radius = Math.sqrt(-2.0 * Math.log(1.0 - u0));
+        const theta = 2.0 * Math.PI * u1;
+        value = odd ? radius * Math.sin(theta) : radius * Math.cos(theta);
+      } else {
+        value = odd ? u1 : u0;
+      }
+      return (this.constants.shift as number) + (this.constants.scale as number) * value;
+    })
+    .setConstants({ normal, scale, shift })
+    .setOutput([size])
+    .setPipeline(true);
+}
+
+/**
+ * Counter-based random number generator running on GPU.
+ *
+ * @remarks
+ * The numbers are determined by the seed and the offset, and match scripts/random_reference.py.
+ * The offset counts the consumed counters, each of which produces two numbers,
+ * and advances by ceil(size / 2) every generation to keep producing fresh numbers.
+ * The output texture is reused by the next generation.
+ *
+ * @example
+ * ```
+ * const generator = new nnabla.RandomGenerator(gpu, 100, { distribution: 'uniform', low: -1, high: 1, seed: 0 });
+ * const z = generator.generate();
+ * nnp.forwardAsync('Runtime', { z }).then((output) => { ... });
+ * ```
+ *
+ */
+export class RandomGenerator {
+  size: number;
+
+  seed: number;
+
+  offset: number;
+
+  kernel: IKernelRunShortcut;
+
+  constructor(gpu: GPU, size: number, config?: RandomConfig) {
+    const normal = (config?.distribution || 'normal') === 'normal';
+    let scale = 1.0;
+    let shift = 0.0;
+    if (normal) {
+      scale = config?.sigma ?? 1.0;
+      shift = config?.mu ?? 0.0;
+    } else {
+      scale = (config?.high ?? 1.0) - (config?.low ?? 0.0);
+      shift = config?.low ?? 0.0;
+    }
+
+    this.size = size;
+    this.seed = 0;
+    this.offset = 0;
+    this.kernel = createThreefryKernel(size, gpu, normal, scale, shift);
+    this.setSeed(config?.seed ?? Math.floor(Math.random() * 2 ** 32), config?.offset ?? 0);
+  }
+
+  /**
+   * Resets the random number sequence.
+   *
+   * @param seed - The non-negative integer seed.
+   * @param offset - The number of counters to skip.
+   *
+   */
+  setSeed(seed: number, offset = 0): void {
+    // Validate before updating the state
+    splitToLimbs(seed);
+    splitToLimbs(offset);
+    this.seed = seed;
+    this.offset = offset;
+  }
+
+  /**
+   * Generates random numbers in one kernel launch.
+   *
+   * @returns The Texture object holding the random numbers.
+   *
+   */
+  generate(): Texture {
+    const output = this.kernel(splitToLimbs(this.seed), splitToLimbs(this.offset)) as Texture;
+    this.offset += Math.ceil(this.size / 2);
+    return output;
+  }
+}
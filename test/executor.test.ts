@@ -14,10 +14,19 @@
 
 import * as fs from 'fs';
 import { GPU } from 'gpu.js';
+import {
+  Function as ProtoFunction,
+  Network as ProtoNetwork,
+  Shape,
+  Variable as ProtoVariable,
+} from '../src/proto/nnabla_pb';
 import { unzipNNP } from '../src/nnp';
 import Network from '../src/network';
 import VariableManager from '../src/variableManager';
 import { Executor } from '../src/executor';
+import { RandomConfig, RandomGenerator } from '../src/random';
+import Variable from '../src/variable';
+import { expectAllClose } from './testUtils';
 
 test('test-executor-from-proto', (done) => {
   fs.readFile('test.nnp', (_, data) => {
@@ -44,3 +53,39 @@ test('test-executor-from-proto', (done) => {
     });
   });
 });
+
+test('test-executor-texture-input', () => {
+  const network = new ProtoNetwork();
+  network.setName('net');
+  for (const name of ['x', 'y']) {
+    const variable = new ProtoVariable();
+    variable.setName(name);
+    variable.setType('Buffer');
+    const shape = new Shape();
+    shape.setDimList([1, 6]);
+    variable.setShape(shape);
+    network.addVariable(variable);
+  }
+  const func = new ProtoFunction();
+  func.setName('ReLU');
+  func.setType('ReLU');
+  func.setInputList(['x']);
+  func.setOutputList(['y']);
+  network.addFunction(func);
+
+  const gpu = new GPU();
+  const executor = new Executor(
+    'runtime',
+    Network.fromProtoNetwork(network, new VariableManager({}), gpu),
+    ['x'],
+    ['y'],
+  );
+  const config: RandomConfig = { distribution: 'uniform', low: -1.0, high: 1.0, seed: 0 };
+  const generator = new RandomGenerator(gpu, 6, config);
+  const output = executor.forward({ x: generator.generate() });
+
+  const x = new Variable('x', [6], []);
+  x.setData(new RandomGenerator(gpu, 6, config).generate());
+  const yRef = Array.from(x.toArray()).map((v) => Math.max(v, 0.0));
+  expectAllClose(output.y, yRef, 0.000001);
+});
@@ -16,7 +16,7 @@ import { GPU } from 'gpu.js';
 import { BatchNormalizationParameter } from '../../src/proto/nnabla_pb';
 import BatchNormalization from '../../src/functions/batchNormalization';
 import Variable from '../../src/variable';
-import { expectAllClose } from '../testUtils';
+import { expectAllClose, transposeArray } from '../testUtils';
 
 function batchNormalizationRef(
   x: number[],
@@ -75,3 +75,36 @@ test('test-batch-normalization', () => {
   );
   expectAllClose(yData, yRef, 0.00001);
 });
+
+test('test-batch-normalization-channel-last', () => {
+  const x = Variable.rand('x', [32, 28, 28, 3]);
+  const mean = Variable.rand('mean', [1, 1, 1, 3]);
+  const vars = Variable.rand('var', [1, 1, 1, 3]);
+  const beta = Variable.rand('beta', [1, 1, 1, 3]);
+  const gamma = Variable.rand('gamma', [1, 1, 1, 3]);
+  const y = Variable.rand('y', [32, 28, 28, 3]);
+  const param = new BatchNormalizationParameter();
+  param.addAxes(3);
+  param.setEps(0.0001);
+  const bn = new BatchNormalization(param, new GPU());
+
+  const varsData = vars.toArray();
+  for (let i = 0; i < vars.size(); i += 1) {
+    varsData[i] += 1.0;
+  }
+
+  bn.setup([x, beta, gamma, mean, vars], [y]);
+  bn.forward([x, beta, gamma, mean, vars], [y]);
+  const yData = y.toArray();
+
+  const yRef = batchNormalizationRef(
+    transposeArray(x.toArray(), x.shape, [0, 3, 1, 2]),
+    [32, 3, 28, 28],
+    mean.toArray(),
+    vars.toArray(),
+    beta.toArray(),
+    gamma.toArray(),
+    0.0001,
+  );
+  expectAllClose(yData, transposeArray(yRef, [32, 3, 28, 28], [0, 2, 3, 1]), 0.00001);
+});
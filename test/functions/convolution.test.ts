@@ -16,7 +16,7 @@ import { GPU } from 'gpu.js';
 import { ConvolutionParameter, Shape } from '../../src/proto/nnabla_pb';
 import Convolution from '../../src/functions/convolution';
 import Variable from '../../src/variable';
-import { expectAllClose } from '../testUtils';
+import { expectAllClose, transposeArray } from '../testUtils';
 
 function convolutionRef(
   x: number[],
@@ -102,3 +102,38 @@ test('test-convolution', () => {
   );
   expectAllClose(yData, yRef, 0.0001);
 });
+
+test('test-convolution-channel-last', () => {
+  const x = Variable.rand('x', [32, 28, 28, 3]);
+  const w = Variable.rand('w', [16, 4, 4, 3]);
+  const b = Variable.rand('b', [16]);
+  const y = Variable.rand('y', [32, 13, 13, 16]);
+
+  const param = new ConvolutionParameter();
+  const pad = new Shape();
+  pad.addDim(0);
+  pad.addDim(0);
+  param.setPad(pad);
+  const stride = new Shape();
+  stride.addDim(2);
+  stride.addDim(2);
+  param.setStride(stride);
+  param.setChannelLast(true);
+
+  const conv = new Convolution(param, new GPU());
+
+  conv.setup([x, w, b], [y]);
+  conv.forward([x, w, b], [y]);
+  const yData = y.toArray();
+
+  const yRef = convolutionRef(
+    transposeArray(x.toArray(), x.shape, [0, 3, 1, 2]),
+    transposeArray(w.toArray(), w.shape, [0, 3, 1, 2]),
+    b.toArray(),
+    [32, 3, 28, 28],
+    [16, 3, 4, 4],
+    [2, 2],
+    [32, 16, 13, 13],
+  );
+  expectAllClose(yData, transposeArray(yRef, [32, 16, 13, 13], [0, 2, 3, 1]), 0.0001);
+});
@@ -16,7 +16,7 @@ import { GPU } from 'gpu.js';
 import { MaxPoolingParameter, Shape } from '../../src/proto/nnabla_pb';
 import MaxPooling from '../../src/functions/maxPooling';
 import Variable from '../../src/variable';
-import { expectAllClose } from '../testUtils';
+import { expectAllClose, transposeArray } from '../testUtils';
 
 function maxPoolingRef(
   x: number[],
@@ -82,3 +82,33 @@ test('test-max-pooling', () => {
   const yRef = maxPoolingRef(x.toArray(), x.shape, [2, 2], [4, 4], y.shape);
   expectAllClose(yData, yRef, 0.0001);
 });
+
+test('test-max-pooling-channel-last', () => {
+  const x = Variable.rand('x', [32, 28, 28, 3]);
+  const y = Variable.rand('y', [32, 13, 13, 3]);
+
+  const param = new MaxPoolingParameter();
+  const pad = new Shape();
+  pad.addDim(0);
+  pad.addDim(0);
+  param.setPad(pad);
+  const stride = new Shape();
+  stride.addDim(2);
+  stride.addDim(2);
+  param.setStride(stride);
+  const kernel = new Shape();
+  kernel.addDim(4);
+  kernel.addDim(4);
+  param.setKernel(kernel);
+  param.setChannelLast(true);
+
+  const pooling = new MaxPooling(param, new GPU());
+
+  pooling.setup([x], [y]);
+  pooling.forward([x], [y]);
+  const yData = y.toArray();
+
+  const xRef = transposeArray(x.toArray(), x.shape, [0, 3, 1, 2]);
+  const yRef = maxPoolingRef(xRef, [32, 3, 28, 28], [2, 2], [4, 4], [32, 3, 13, 13]);
+  expectAllClose(yData, transposeArray(yRef, [32, 3, 13, 13], [0, 2, 3, 1]), 0.0001);
+});
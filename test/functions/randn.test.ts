@@ -16,7 +16,7 @@ import { GPU } from 'gpu.js';
 import { RandnParameter } from '../../src/proto/nnabla_pb';
 import Randn from '../../src/functions/randn';
 import Variable from '../../src/variable';
-import { expectClose } from '../testUtils';
+import { expectAllClose, expectClose } from '../testUtils';
 
 test('test-addScalar', () => {
   const y = Variable.rand('y', [100000]);
@@ -43,3 +43,31 @@ test('test-addScalar', () => {
   variance /= 100000;
   expectClose(variance, 0.0, 1.005);
 });
+
+test('test-randn-seed', () => {
+  const y = Variable.rand('y', [1000]);
+  const param = new RandnParameter();
+  param.setMu(1.0);
+  param.setSigma(2.0);
+  param.setSeed(313);
+  const gpu = new GPU();
+
+  const randn1 = new Randn(param, gpu);
+  randn1.setup([], [y]);
+  randn1.forward([], [y]);
+  const yData1 = Array.from(y.toArray());
+  randn1.forward([], [y]);
+  const yData2 = Array.from(y.toArray());
+
+  // The same seed gives the same sequence
+  const randn2 = new Randn(param, gpu);
+  randn2.setup([], [y]);
+  randn2.forward([], [y]);
+  expectAllClose(Array.from(y.toArray()), yData1, 0.000001);
+
+  // The sequence continues over forward calls
+  expect(yData2).not.toEqual(yData1);
+  randn2.setSeed(313, 500);
+  randn2.forward([], [y]);
+  expectAllClose(Array.from(y.toArray()), yData2, 0.000001);
+});
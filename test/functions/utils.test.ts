@@ -20,7 +20,7 @@ import {
   createIm2ColKernel,
   createCol2ImKernel,
 } from '../../src/functions/utils';
-import { expectAllClose } from '../testUtils';
+import { expectAllClose, transposeArray } from '../testUtils';
 
 function transpose(x: number[], shape: number[]): number[] {
   const y: number[] = [];
@@ -222,6 +222,32 @@ test('test-im2col', () => {
   expectAllClose(y, refY, 0.0001);
 });
 
+test('test-im2col-channel-last', () => {
+  const shape = [32, 28, 28, 3];
+  const x = Variable.rand('x', shape);
+  const stride = [2, 2];
+  const gpu = new GPU();
+
+  const outHeight = (28 - 2) / 2 + 1;
+  const outWidth = outHeight;
+  const L = outHeight * outWidth;
+
+  const [im2col, outputShape] = createIm2ColKernel(gpu, shape, [2, 2], stride, [0, 0], true);
+  const y = im2col(x.toArray()) as number[];
+
+  // (B, C, K, L) -> (B, L, K, C)
+  const refY = refIm2Col(
+    transposeArray(x.toArray(), shape, [0, 3, 1, 2]),
+    [32, 3, 28, 28],
+    outHeight,
+    outWidth,
+    [2, 2],
+    stride,
+  );
+  expect(outputShape).toEqual([32, L, 4, 3]);
+  expectAllClose(y, transposeArray(refY, [32, 3, 4, L], [0, 3, 2, 1]), 0.0001);
+});
+
 function refCol2Im(
   x: number[],
   shape: number[],
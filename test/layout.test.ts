@@ -0,0 +1,411 @@
+// Copyright 2022 Sony Group Corporation.
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+import { GPU } from 'gpu.js';
+import {
+  AveragePoolingParameter,
+  BatchNormalizationParameter,
+  ConvolutionParameter,
+  DataVariable,
+  Executor as ProtoExecutor,
+  Function as ProtoFunction,
+  MaxPoolingParameter,
+  Network as ProtoNetwork,
+  OutputVariable,
+  ReshapeParameter,
+  Shape,
+  TransposeParameter,
+  Variable as ProtoVariable,
+} from '../src/proto/nnabla_pb';
+import { Executor } from '../src/executor';
+import optimizeLayout, { optimizeNetworkLayouts } from '../src/layout';
+import Network from '../src/network';
+import Variable from '../src/variable';
+import VariableManager from '../src/variableManager';
+import { expectAllClose } from './testUtils';
+
+function createShape(dims: number[]): Shape {
+  const shape = new Shape();
+  shape.setDimList(dims);
+  return shape;
+}
+
+function addVariable(network: ProtoNetwork, name: string, type: string, dims: number[]): void {
+  const variable = new ProtoVariable();
+  variable.setName(name);
+  variable.setType(type);
+  variable.setShape(createShape(dims));
+  network.addVariable(variable);
+}
+
+function addFunction(
+  network: ProtoNetwork,
+  type: string,
+  inputs: string[],
+  outputs: string[],
+): ProtoFunction {
+  const func = new ProtoFunction();
+  func.setName(`${type}_${network.getFunctionList().length}`);
+  func.setType(type);
+  func.setInputList(inputs);
+  func.setOutputList(outputs);
+  network.addFunction(func);
+  return func;
+}
+
+function addTranspose(network: ProtoNetwork, input: string, output: string, axes: number[]): void {
+  const param = new TransposeParameter();
+  param.setAxesList(axes);
+  addFunction(network, 'Transpose', [input], [output]).setTransposeParam(param);
+}
+
+// x (B, H, W, C) -> transpose -> conv -> relu -> pool -> transpose or reshape -> y
+function createNetwork(withTrailingTranspose: boolean): ProtoNetwork {
+  const network = new ProtoNetwork();
+  network.setName('net');
+  addVariable(network, 'x', 'Buffer', [-1, 8, 8, 3]);
+  addVariable(network, 'h0', 'Buffer', [-1, 3, 8, 8]);
+  addVariable(network, 'w', 'Parameter', [4, 3, 2, 2]);
+  addVariable(network, 'b', 'Parameter', [4]);
+  addVariable(network, 'h1', 'Buffer', [-1, 4, 7, 7]);
+  addVariable(network, 'h2', 'Buffer', [-1, 4, 7, 7]);
+  addVariable(network, 'h3', 'Buffer', [-1, 4, 3, 3]);
+
+  addTranspose(network, 'x', 'h0', [0, 3, 1, 2]);
+
+  const convParam = new ConvolutionParameter();
+  convParam.setPad(createShape([0, 0]));
+  convParam.setStride(createShape([1, 1]));
+  addFunction(network, 'Convolution', ['h0', 'w', 'b'], ['h1']).setConvolutionParam(convParam);
+
+  addFunction(network, 'ReLU', ['h1'], ['h2']);
+
+  const poolParam = new MaxPoolingParameter();
+  poolParam.setKernel(createShape([2, 2]));
+  poolParam.setStride(createShape([2, 2]));
+  poolParam.setPad(createShape([0, 0]));
+  addFunction(network, 'MaxPooling', ['h2'], ['h3']).setMaxPoolingParam(poolParam);
+
+  if (withTrailingTranspose) {
+    addVariable(network, 'y', 'Buffer', [-1, 3, 3, 4]);
+    addTranspose(network, 'h3', 'y', [0, 2, 3, 1]);
+  } else {
+    addVariable(network, 'y', 'Buffer', [-1, 36]);
+    const reshapeParam = new ReshapeParameter();
+    reshapeParam.setShape(createShape([-1, 36]));
+    addFunction(network, 'Reshape', ['h3'], ['y']).setReshapeParam(reshapeParam);
+  }
+  return network;
+}
+
+function forward(
+  network: ProtoNetwork,
+  parameters: { [key: string]: Variable },
+  x: number[],
+  outputNames: string[],
+  optimize: boolean,
+): { [key: string]: number[] } {
+  // Each network gets its own copies since the optimization registers reordered weights
+  const variables: { [key: string]: Variable } = {};
+  for (const name of Object.keys(parameters)) {
+    const parameter = parameters[name];
+    variables[name] = new Variable(name, parameter.shape, Array.from(parameter.toArray()));
+  }
+  const variableManager = new VariableManager(variables);
+  if (optimize) {
+    optimizeLayout(network, variableManager, ['x', ...outputNames]);
+  }
+  const executor = new Executor(
+    'runtime',
+    Network.fromProtoNetwork(network, variableManager, new GPU()),
+    ['x'],
+    outputNames,
+  );
+  return executor.forward({ x });
+}
+
+function expectSameForward(
+  createNetwork: () => ProtoNetwork,
+  parameters: { [key: string]: Variable },
+  xShape: number[],
+  outputNames: string[],
+): void {
+  const x = Variable.rand('x', xShape).toArray();
+  const y = forward(createNetwork(), parameters, x, outputNames, true);
+  const yRef = forward(createNetwork(), parameters, x, outputNames, false);
+  for (const name of outputNames) {
+    expectAllClose(y[name], yRef[name], 0.0001);
+  }
+}
+
+test.each([[true], [false]])('test-optimize-layout', (withTrailingTranspose: boolean) => {
+  const w = Variable.rand('w', [4, 3, 2, 2]);
+  const b = Variable.rand('b', [4]);
+
+  const network = createNetwork(withTrailingTranspose);
+  const variableManager = new VariableManager({ w, b });
+  optimizeLayout(network, variableManager, ['x', 'y']);
+
+  const conv = network.getFunctionList().find((func) => func.getType() === 'Convolution');
+  expect(conv?.getConvolutionParam()?.getChannelLast()).toBe(true);
+  expect(conv?.getInputList()).toEqual(['x', 'w/channel_last', 'b']);
+  expect(variableManager.getVariable('w/channel_last').shape).toEqual([4, 2, 2, 3]);
+  // All transpositions are removed, or moved to the smaller pooled output
+  const types = network.getFunctionList().map((func) => func.getType());
+  expect(types.filter((type) => type === 'Transpose').length).toBe(withTrailingTranspose ? 0 : 1);
+  expect(types.includes('Reshape')).toBe(true);
+
+  expectSameForward(() => createNetwork(withTrailingTranspose), { w, b }, [1, 8, 8, 3], ['y']);
+});
+
+test('test-optimize-layout-preserved', () => {
+  const network = createNetwork(true);
+  const variableManager = new VariableManager({
+    w: Variable.rand('w', [4, 3, 2, 2]),
+    b: Variable.rand('b', [4]),
+  });
+  // Intermediate outputs exposed to users keep the channel-first layout
+  optimizeLayout(network, variableManager, ['x', 'y', 'h2']);
+
+  expect(network.getFunctionList().length).toBe(5);
+  expect(network.getFunctionList()[0].getType()).toBe('Transpose');
+  expect(variableManager.hasVariable('w/channel_last')).toBe(false);
+});
+
+function getShapes(network: ProtoNetwork): { [key: string]: number[] } {
+  const shapes: { [key: string]: number[] } = {};
+  for (const variable of network.getVariableList()) {
+    shapes[variable.getName()] = variable.getShape()?.getDimList() || [];
+  }
+  return shapes;
+}
+
+test('test-optimize-layout-shared-variables', () => {
+  // Training and runtime networks share the variable names
+  const main = createNetwork(false);
+  main.setName('Main');
+  const runtime = createNetwork(false);
+  runtime.setName('MainRuntime');
+
+  const executor = new ProtoExecutor();
+  executor.setName('runtime');
+  executor.setNetworkName('MainRuntime');
+  const dataVariable = new DataVariable();
+  dataVariable.setVariableName('x');
+  executor.addDataVariable(dataVariable);
+  const outputVariable = new OutputVariable();
+  outputVariable.setVariableName('y');
+  executor.addOutputVariable(outputVariable);
+
+  const variableManager = new VariableManager({
+    w: Variable.rand('w', [4, 3, 2, 2]),
+    b: Variable.rand('b', [4]),
+  });
+  const shapes = getShapes(main);
+  optimizeNetworkLayouts([main, runtime], [executor], variableManager);
+
+  // Both networks are rewritten with their own channel-last variables
+  for (const network of [main, runtime]) {
+    const rewrittenShapes = getShapes(network);
+    for (const name of Object.keys(shapes)) {
+      expect(rewrittenShapes[name]).toEqual(shapes[name]);
+    }
+    expect(rewrittenShapes['h1/channel_last']).toEqual([-1, 7, 7, 4]);
+    expect(rewrittenShapes['h3/channel_last']).toEqual([-1, 3, 3, 4]);
+    expect(network.getFunctionList()[0].getType()).toBe('Convolution');
+  }
+});
+
+function addConvolution(
+  network: ProtoNetwork,
+  inputs: string[],
+  output: string,
+  dims: number[],
+): void {
+  addVariable(network, output, 'Buffer', dims);
+  const param = new ConvolutionParameter();
+  param.setPad(createShape([0, 0]));
+  param.setStride(createShape([1, 1]));
+  addFunction(network, 'Convolution', inputs, [output]).setConvolutionParam(param);
+}
+
+function addMaxPooling(network: ProtoNetwork, input: string, output: string, dims: number[]): void {
+  addVariable(network, output, 'Buffer', dims);
+  const param = new MaxPoolingParameter();
+  param.setKernel(createShape([2, 2]));
+  param.setStride(createShape([2, 2]));
+  param.setPad(createShape([0, 0]));
+  addFunction(network, 'MaxPooling', [input], [output]).setMaxPoolingParam(param);
+}
+
+function addReshape(network: ProtoNetwork, input: string, output: string, dims: number[]): void {
+  addVariable(network, output, 'Buffer', dims);
+  const param = new ReshapeParameter();
+  param.setShape(createShape(dims));
+  addFunction(network, 'Reshape', [input], [output]).setReshapeParam(param);
+}
+
+// x (B, H, W, 8) -> transpose -> h0 -> conv -> h1 (B, 4, 7, 7) -> relu -> h2
+function createConvolutionNetwork(): ProtoNetwork {
+  const network = new ProtoNetwork();
+  network.setName('net');
+  addVariable(network, 'x', 'Buffer', [-1, 8, 8, 8]);
+  addVariable(network, 'h0', 'Buffer', [-1, 8, 8, 8]);
+  addVariable(network, 'w', 'Parameter', [4, 8, 2, 2]);
+  addVariable(network, 'b', 'Parameter', [4]);
+  addTranspose(network, 'x', 'h0', [0, 3, 1, 2]);
+  addConvolution(network, ['h0', 'w', 'b'], 'h1', [-1, 4, 7, 7]);
+  addVariable(network, 'h2', 'Buffer', [-1, 4, 7, 7]);
+  addFunction(network, 'ReLU', ['h1'], ['h2']);
+  return network;
+}
+
+function createConvolutionParameters(): { [key: string]: Variable } {
+  return { w: Variable.rand('w', [4, 8, 2, 2]), b: Variable.rand('b', [4]) };
+}
+
+// h3 = h1 + relu(h1) -> conv -> pool -> flatten -> y, h3 -> flatten -> y2
+function createResidualNetwork(): ProtoNetwork {
+  const network = createConvolutionNetwork();
+  addVariable(network, 'h3', 'Buffer', [-1, 4, 7, 7]);
+  addFunction(network, 'Add2', ['h1', 'h2'], ['h3']);
+  addVariable(network, 'w2', 'Parameter', [4, 4, 2, 2]);
+  addVariable(network, 'b2', 'Parameter', [4]);
+  addConvolution(network, ['h3', 'w2', 'b2'], 'h4', [-1, 4, 6, 6]);
+  addMaxPooling(network, 'h4', 'h5', [-1, 4, 3, 3]);
+  addReshape(network, 'h5', 'y', [-1, 36]);
+  addReshape(network, 'h3', 'y2', [-1, 196]);
+  return network;
+}
+
+test('test-optimize-layout-residual', () => {
+  const parameters = {
+    ...createConvolutionParameters(),
+    w2: Variable.rand('w2', [4, 4, 2, 2]),
+    b2: Variable.rand('b2', [4]),
+  };
+
+  const network = createResidualNetwork();
+  optimizeLayout(network, new VariableManager({ ...parameters }), ['x', 'y', 'y2']);
+  const add = network.getFunctionList().find((func) => func.getType() === 'Add2');
+  expect(add?.getInputList()).toEqual(['h1/channel_last', 'h2/channel_last']);
+  expect(add?.getOutputList()).toEqual(['h3/channel_last']);
+  const shapes = getShapes(network);
+  expect(shapes['h3/channel_last']).toEqual([-1, 7, 7, 4]);
+  expect(shapes.h3).toEqual([-1, 4, 7, 7]);
+
+  expectSameForward(createResidualNetwork, parameters, [1, 8, 8, 8], ['y', 'y2']);
+});
+
+// h2 -> pool -> h3 -> transpose -> flatten -> y, h3 -> flatten -> y2, h2 -> flatten -> y3
+function createBranchNetwork(): ProtoNetwork {
+  const network = createConvolutionNetwork();
+  addMaxPooling(network, 'h2', 'h3', [-1, 4, 3, 3]);
+  addVariable(network, 'h4', 'Buffer', [-1, 3, 3, 4]);
+  addTranspose(network, 'h3', 'h4', [0, 2, 3, 1]);
+  addReshape(network, 'h4', 'y', [-1, 36]);
+  addReshape(network, 'h3', 'y2', [-1, 36]);
+  addReshape(network, 'h2', 'y3', [-1, 196]);
+  return network;
+}
+
+test('test-optimize-layout-boundary', () => {
+  const parameters = createConvolutionParameters();
+
+  const network = createBranchNetwork();
+  optimizeLayout(network, new VariableManager({ ...parameters }), ['x', 'y', 'y2', 'y3']);
+  // The flattened outputs read channel-first data transposed back at the boundary
+  const transposes = network.getFunctionList().filter((func) => func.getType() === 'Transpose');
+  expect(transposes.map((func) => func.getOutputList()[0]).sort()).toEqual(['h2', 'h3']);
+
+  expectSameForward(createBranchNetwork, parameters, [1, 8, 8, 8], ['y', 'y2', 'y3']);
+});
+
+// h0 -> flatten -> y2, h2 -> pool -> transpose -> y
+function createSharedEntryNetwork(): ProtoNetwork {
+  const network = createConvolutionNetwork();
+  addReshape(network, 'h0', 'y2', [-1, 512]);
+  addMaxPooling(network, 'h2', 'h3', [-1, 4, 3, 3]);
+  addVariable(network, 'y', 'Buffer', [-1, 3, 3, 4]);
+  addTranspose(network, 'h3', 'y', [0, 2, 3, 1]);
+  return network;
+}
+
+test('test-optimize-layout-shared-entry', () => {
+  const parameters = createConvolutionParameters();
+
+  const network = createSharedEntryNetwork();
+  optimizeLayout(network, new VariableManager({ ...parameters }), ['x', 'y', 'y2']);
+  // The leading transposition is kept for the flattened output
+  const types = network.getFunctionList().map((func) => func.getType());
+  expect(types[0]).toBe('Transpose');
+  expect(types.filter((type) => type === 'Transpose').length).toBe(1);
+  const conv = network.getFunctionList().find((func) => func.getType() === 'Convolution');
+  expect(conv?.getInputList()[0]).toBe('x');
+
+  expectSameForward(createSharedEntryNetwork, parameters, [1, 8, 8, 8], ['y', 'y2']);
+});
+
+// h2 -> batch normalization -> average pooling -> transpose -> y
+function createNormalizationNetwork(): ProtoNetwork {
+  const network = createConvolutionNetwork();
+  for (const name of ['beta', 'gamma', 'mean', 'var']) {
+    addVariable(network, name, 'Parameter', [1, 4, 1, 1]);
+  }
+  addVariable(network, 'h3', 'Buffer', [-1, 4, 7, 7]);
+  const bnParam = new BatchNormalizationParameter();
+  bnParam.setAxesList([1]);
+  bnParam.setEps(0.0001);
+  addFunction(
+    network,
+    'BatchNormalization',
+    ['h2', 'beta', 'gamma', 'mean', 'var'],
+    ['h3'],
+  ).setBatchNormalizationParam(bnParam);
+
+  addVariable(network, 'h4', 'Buffer', [-1, 4, 3, 3]);
+  const poolParam = new AveragePoolingParameter();
+  poolParam.setKernel(createShape([2, 2]));
+  poolParam.setStride(createShape([2, 2]));
+  poolParam.setPad(createShape([0, 0]));
+  addFunction(network, 'AveragePooling', ['h3'], ['h4']).setAveragePoolingParam(poolParam);
+
+  addVariable(network, 'y', 'Buffer', [-1, 3, 3, 4]);
+  addTranspose(network, 'h4', 'y', [0, 2, 3, 1]);
+  return network;
+}
+
+test('test-optimize-layout-normalization', () => {
+  const vars = Variable.rand('var', [1, 4, 1, 1]);
+  const parameters = {
+    ...createConvolutionParameters(),
+    beta: Variable.rand('beta', [1, 4, 1, 1]),
+    gamma: Variable.rand('gamma', [1, 4, 1, 1]),
+    mean: Variable.rand('mean', [1, 4, 1, 1]),
+    var: new Variable(
+      'var',
+      vars.shape,
+      Array.from(vars.toArray()).map((v) => v + 1.0),
+    ),
+  };
+
+  const network = createNormalizationNetwork();
+  optimizeLayout(network, new VariableManager({ ...parameters }), ['x', 'y']);
+  const bn = network.getFunctionList().find((func) => func.getType() === 'BatchNormalization');
+  expect(bn?.getBatchNormalizationParam()?.getAxesList()).toEqual([3]);
+  const pool = network.getFunctionList().find((func) => func.getType() === 'AveragePooling');
+  expect(pool?.getAveragePoolingParam()?.getChannelLast()).toBe(true);
+
+  expectSameForward(createNormalizationNetwork, parameters, [1, 8, 8, 8], ['y']);
+});
@@ -0,0 +1,62 @@
+// Copyright 2022 Sony Group Corporation.
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+import { GPU } from 'gpu.js';
+import { RandomGenerator, splitToLimbs } from '../src/random';
+import Variable from '../src/variable';
+import { expectAllClose } from './testUtils';
+
+function generate(generator: RandomGenerator): number[] {
+  const y = new Variable('y', [generator.size], []);
+  y.setData(generator.generate());
+  return Array.from(y.toArray());
+}
+
+test('test-split-to-limbs', () => {
+  expect(splitToLimbs(0)).toEqual([0, 0, 0, 0]);
+  expect(splitToLimbs(2 ** 32 + 65537)).toEqual([1, 1, 1, 0]);
+  expect(() => splitToLimbs(-1)).toThrow();
+  expect(() => splitToLimbs(0.5)).toThrow();
+});
+
+// Upper 24 bits of Threefry-2x32-20 outputs, same as scripts/random_reference.py
+test.each([
+  [0, 0, [7020545, 10074702, 5279483, 12639807, 6596134, 16520677]],
+  [12345, 7, [16336329, 5211487, 10168739, 3515687, 11407220, 16270920]],
+  [2 ** 32 - 1, 2 ** 32 - 1, [15349618, 11907746, 3706930, 16353422, 15798893, 10041751]],
+])('test-random-uniform', (seed: number, offset: number, bits: number[]) => {
+  const generator = new RandomGenerator(new GPU(), 6, { distribution: 'uniform', seed, offset });
+  expectAllClose(generate(generator), bits.map((v) => v / 16777216), 0.000001);
+  expect(generator.offset).toBe(offset + 3);
+});
+
+test('test-random-normal', () => {
+  const generator = new RandomGenerator(new GPU(), 2, { mu: 1.0, sigma: 2.0, seed: 3 });
+  expectAllClose(generate(generator), [1.0 + 2.0 * 0.61105523, 1.0 - 2.0 * 0.18463485], 0.0001);
+});
+
+test('test-random-streaming', () => {
+  const gpu = new GPU();
+  const generator = new RandomGenerator(gpu, 1000, { seed: 0 });
+  const y1 = generate(generator);
+  const y2 = generate(generator);
+
+  // Two consecutive generations are equal to the one with the double size
+  const batchGenerator = new RandomGenerator(gpu, 2000, { seed: 0 });
+  expectAllClose(y1.concat(y2), generate(batchGenerator), 0.000001);
+
+  // Resetting the seed reproduces the sequence
+  generator.setSeed(0, 500);
+  expectAllClose(generate(generator), y2, 0.000001);
+});
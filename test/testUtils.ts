@@ -23,3 +23,20 @@ export function expectAllClose(x: number[], y: number[], atol: number): void {
     expectClose(x[i], y[i], atol);
   }
 }
+
+export function transposeArray(x: number[], shape: number[], axes: number[]): number[] {
+  const ndim = shape.length;
+  const strides = shape.map((_, i) => shape.slice(i + 1).reduce((a, b) => a * b, 1));
+  const outShape = axes.map((axis) => shape[axis]);
+  const y: number[] = [];
+  for (let i = 0; i < x.length; i += 1) {
+    let index = i;
+    let srcIndex = 0;
+    for (let j = ndim - 1; j >= 0; j -= 1) {
+      srcIndex += (index % outShape[j]) * strides[axes[j]];
+      index = Math.floor(index / outShape[j]);
+    }
+    y.push(x[srcIndex]);
+  }
+  return y;
+}